@@ -1,6 +1,61 @@
+import numpy as np
 from enum import Enum
-from collections import deque
-from utils import Cell, Grid, KeyboardListener
+from numba import njit
+from utils import Cell, Grid
+
+# Head shift indexed by direction value and head column parity
+_POSITION_CHANGE = (
+    ((-1, 0), (-1, 0)),    # NORTH
+    ((0, 1), (-1, 1)),     # NORTH_EAST
+    ((0, -1), (-1, -1)),   # NORTH_WEST
+    ((1, 0), (1, 0)),      # SOUTH
+    ((1, -1), (0, -1)),    # SOUTH_WEST
+    ((1, 1), (0, 1)),      # SOUTH_EAST
+)
+
+# Fruit direction one-hot slot indexed by sign of x and y difference
+# (-1 means fruit is on the head field)
+_FRUIT_SLOT = (
+    (7, 0, 1),   # NW, N, NE
+    (6, -1, 2),  # W, -, E
+    (5, 4, 3),   # SW, S, SE
+)
+
+_POSITION_TABLE = np.array(_POSITION_CHANGE, np.int64)
+_FRUIT_SLOT_TABLE = np.array(_FRUIT_SLOT, np.int64)
+
+
+@njit(cache=True)
+def _observe(type_grid, hx, hy, fx, fy, position_table):
+    """
+    Compute bot observation from grid cell types.
+    @param type_grid: array of cell type values
+    @param hx: head x coordinate
+    @param hy: head y coordinate
+    @param fx: fruit x coordinate
+    @param fy: fruit y coordinate
+    @param position_table: head shift table as array
+    @return: observation
+    """
+    state = np.zeros(15, np.float32)
+    # Check if fields around head are available
+    parity = hy & 1
+    for direction_value in range(6):
+        cell_type = type_grid[hx + position_table[direction_value, parity, 0],
+                              hy + position_table[direction_value, parity, 1]]
+        if 1 <= cell_type <= 3:
+            state[direction_value] = 1
+
+    # Use one-hot encoding to define fruit direction
+    x_sign = int(fx > hx) - int(fx < hx)
+    y_sign = int(fy > hy) - int(fy < hy)
+    slot = _FRUIT_SLOT_TABLE[x_sign + 1, y_sign + 1]
+    if slot >= 0:
+        state[6 + slot] = 1
+
+    state[14] = np.sqrt((fx - hx) ** 2 + (fy - hy) ** 2)
+
+    return state
 
 
 class Snake:
@@ -12,12 +67,14 @@ class Snake:
         SOUTH_WEST = 4
         SOUTH_EAST = 5
 
-    KEY_TO_DIRECTION = dict(zip(KeyboardListener.VALID_KEYS, Direction))
+    VALID_KEYS = ("w", "e", "q", "s", "a", "d")
+    KEY_TO_DIRECTION = dict(zip(VALID_KEYS, Direction))
 
-    def __init__(self, head: Cell,
+    def __init__(self, grid: Grid, head: Cell,
                  current_direction: Direction,
-                 snake_type: Cell.Type = Cell.Type.SNAKE):
+                 snake_type: int = Cell.Type.SNAKE):
         """
+        @param grid: playing area, used to size body buffers
         @param head: head field
         @param current_direction: snake starting direction
         @param snake_type: type of snake (player or bot)
@@ -26,9 +83,15 @@ class Snake:
         self._head = self._previous_head = head
         self._head.cell_type = self._snake_type = snake_type
         self._score = 0
-        self._body = deque([self._head])
         self._lost = False
 
+        # Body coordinates kept in ring buffer from head to tail index
+        self._capacity = grid.rows * grid.cols
+        self._body_x = np.empty(self._capacity, np.int32)
+        self._body_y = np.empty(self._capacity, np.int32)
+        self._head_i = self._tail_i = 0
+        self._body_x[0], self._body_y[0] = head.x, head.y
+
     @property
     def score(self):
         """
@@ -71,16 +134,7 @@ class Snake:
         @param direction: requested direction
         @return: head shift
         """
-        position_change = {
-            self.Direction.NORTH_EAST: ((0, 1), (-1, 1)),
-            self.Direction.NORTH_WEST: ((0, -1), (-1, -1)),
-            self.Direction.SOUTH_EAST: ((1, 1), (0, 1)),
-            self.Direction.SOUTH_WEST: ((1, -1), (0, -1)),
-            self.Direction.NORTH: ((-1, 0), (-1, 0)),
-            self.Direction.SOUTH: ((1, 0), (1, 0))
-        }
-
-        return position_change[direction][self._head.y % 2]
+        return _POSITION_CHANGE[direction.value][self._head.y & 1]
 
     def move(self, game):
         """
@@ -91,47 +145,53 @@ class Snake:
         x_delta, y_delta = self._head_position_change(self._current_direction)
         new_head = game.grid[self._head.x + x_delta, self._head.y + y_delta]
 
-        tail = self._body[-1]
-        for i in range(len(self._body) - 1, 0, -1):
-            self._body[i] = self._body[i - 1]
-
         # Check collision and fruit eaten conditions
-        if new_head.cell_type.value in range(1, 4):
-            self._body.append(tail)
-            return self.remove_body()
+        if 1 <= new_head.cell_type <= 3:
+            return self.remove_body(game)
         elif new_head.cell_type == Cell.Type.FRUIT:
             self._score += 10
-            self._body.append(tail)
             game._insert_fruit()
         else:
+            tail = game.grid[self._body_x[self._tail_i],
+                             self._body_y[self._tail_i]]
             tail.cell_type = Cell.Type.NORMAL
+            self._tail_i = (self._tail_i - 1) % self._capacity
 
         # Update head field
         new_head.cell_type = self._snake_type
         self._previous_head = self._head
-        self._head = self._body[0] = new_head
+        self._head = new_head
+        self._head_i = (self._head_i - 1) % self._capacity
+        self._body_x[self._head_i] = new_head.x
+        self._body_y[self._head_i] = new_head.y
 
-    def remove_body(self):
+    def remove_body(self, game):
         """
         Method to remove dead snake from playing area.
+        @param game: Game object
         """
-        for cell in self._body:
+        length = (self._tail_i - self._head_i) % self._capacity + 1
+        for i in range(self._head_i, self._head_i + length):
+            i %= self._capacity
+            cell = game.grid[self._body_x[i], self._body_y[i]]
             cell.cell_type = Cell.Type.NORMAL
 
-        self._body.clear()
+        self._tail_i = self._head_i
         self._lost = True
 
 
 class Bot(Snake):
-    def __init__(self, head: Cell,
+    def __init__(self, grid: Grid, head: Cell,
                  current_direction: Snake.Direction,
-                 snake_type: Cell.Type = Cell.Type.BOT):
+                 snake_type: int = Cell.Type.BOT):
         """
+        @param grid: playing area, used to size body buffers
         @param head: head field
         @param current_direction: snake starting direction
         @param snake_type: type of snake (player or bot)
         """
-        super().__init__(head, current_direction, snake_type=snake_type)
+        super().__init__(grid, head, current_direction,
+                         snake_type=snake_type)
         self.__previous_score = self._score
 
     def update_direction(self, action: int):
@@ -149,38 +209,10 @@ class Bot(Snake):
         @param grid: Grid object
         @return: reward for action and post move observation
         """
-        state = []
-        # Check if fields around head are available
-        for direction in self.Direction:
-            x_change, y_change = self._head_position_change(direction)
-            cell = grid[self._head.x + x_change, self._head.y + y_change]
-            state.append(int(cell.cell_type.value in range(1, 4)))
-
-        fruit_position = [0] * 8
-        fruit = grid[Cell.Type.FRUIT][0]
-
-        # Use one-hot encoding to define fruit direction
-        if fruit.x > self._head.x:
-            if fruit.y > self._head.y:
-                fruit_position[3] = 1  # SE
-            elif fruit.y < self._head.y:
-                fruit_position[5] = 1  # SW
-            elif fruit.y == self._head.y:
-                fruit_position[4] = 1  # S
-        elif fruit.x < self._head.x:
-            if fruit.y > self._head.y:
-                fruit_position[1] = 1  # NE
-            elif fruit.y < self._head.y:
-                fruit_position[7] = 1  # NW
-            elif fruit.y == self._head.y:
-                fruit_position[0] = 1  # N
-        elif fruit.x == self._head.x:
-            if fruit.y > self._head.y:
-                fruit_position[2] = 1  # E
-            elif fruit.y < self._head.y:
-                fruit_position[6] = 1  # W
-
-        state += fruit_position
+        fruit = grid.cells_of(Cell.Type.FRUIT)[0]
+        state = _observe(grid.types, self._head.x, self._head.y,
+                         fruit.x, fruit.y, _POSITION_TABLE)
+
         current_distance = self.__calculate_distance(fruit, self._head)
         if self._score > self.__previous_score:
             reward = 10
@@ -190,8 +222,6 @@ class Bot(Snake):
                                                           self._previous_head)
             reward = 2 if current_distance < previous_distance else -3
 
-        state.append(current_distance)
-
         return state, reward
 
     @staticmethod
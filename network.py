@@ -1,8 +1,7 @@
 import os
-import random
 import numpy as np
-from collections import deque
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+import tensorflow as tf
 from tensorflow.python.keras import Sequential
 from tensorflow.python.keras.layers import Dense
 from tensorflow.keras.optimizers import Adam
@@ -10,11 +9,14 @@ from tensorflow.python.keras.models import load_model
 
 
 class DQNetwork:
+    # Fixed point scale of states kept in replay memory
+    STATE_SCALE = 256
+
     def __init__(self, gamma: float, n_actions: int, epsilon: float,
                  batch_size: int, input_dims: int, lr: float = 0.00025,
                  epsilon_delta: float = 1e-5, epsilon_final: float = 0.01,
                  memory_size: int = 1000000, filename: str = "model.h5",
-                 train: bool = True):
+                 train: bool = True, train_interval: int = 1):
         """
         @param gamma: gamma parameter in Q-learning
         @param n_actions: number of possible actions
@@ -28,6 +30,7 @@ class DQNetwork:
         @param filename: model filename
         @param train: True if new model has to be created,
                       otherwise load model from file
+        @param train_interval: number of train calls per gradient step
         """
         self.action_space = range(n_actions)
         self.gamma = gamma
@@ -35,10 +38,34 @@ class DQNetwork:
         self.epsilon_delta = epsilon_delta
         self.epsilon_final = epsilon_final
         self.batch_size = batch_size
+        self.train_interval = train_interval
+        self._steps_since_train = 0
         self.model_file = filename
-        self.memory = deque(maxlen=memory_size)
+        self.memory_size = memory_size
+        self._s = np.empty((memory_size, input_dims), np.int16)
+        self._a = np.empty(memory_size, np.int32)
+        self._r = np.empty(memory_size, np.float32)
+        self._s2 = np.empty((memory_size, input_dims), np.int16)
+        self._d = np.empty(memory_size, np.float32)
+        self._ptr = self._size = 0
+        self._buffers = (self._s, self._a, self._r, self._s2, self._d)
+        self._batch = tuple(np.empty((batch_size,) + buffer.shape[1:],
+                                     buffer.dtype)
+                            for buffer in self._buffers)
+        self._batch_index = tf.range(batch_size, dtype=tf.int32)
         self.model = (self.create_model(lr, n_actions, input_dims)
                       if train else self.load_model())
+        self._predict_fn = tf.function(
+            lambda x: self.model(x, training=False),
+            input_signature=[tf.TensorSpec((None, input_dims), tf.float32)])
+        self._train_step_fn = tf.function(
+            self._train_step,
+            input_signature=[
+                tf.TensorSpec((batch_size, input_dims), tf.int16),
+                tf.TensorSpec((batch_size,), tf.int32),
+                tf.TensorSpec((batch_size,), tf.float32),
+                tf.TensorSpec((batch_size, input_dims), tf.int16),
+                tf.TensorSpec((batch_size,), tf.float32)])
 
     @staticmethod
     def create_model(lr, n_actions, input_dims):
@@ -63,7 +90,15 @@ class DQNetwork:
         Method to save current transition.
         @param transition: current transition
         """
-        self.memory.append(transition)
+        state, action, reward, next_state, done = transition
+        i = self._ptr % self.memory_size
+        self._s[i] = np.rint(np.multiply(state, self.STATE_SCALE))
+        self._a[i] = action
+        self._r[i] = reward
+        self._s2[i] = np.rint(np.multiply(next_state, self.STATE_SCALE))
+        self._d[i] = done
+        self._ptr += 1
+        self._size = min(self._size + 1, self.memory_size)
 
     def choose_action(self, observation: list) -> int:
         """
@@ -74,42 +109,94 @@ class DQNetwork:
         if np.random.random() < self.epsilon:
             action = np.random.choice(self.action_space)
         else:
-            state = np.array(observation)
+            state = np.array(observation, dtype=np.float32)
             state = state[np.newaxis, :]
-            actions = self.model.predict(state)
+            actions = self._predict_fn(tf.constant(state)).numpy()
             action = np.argmax(actions)
 
         return action
 
+    def choose_actions(self, observations: np.ndarray) -> np.ndarray:
+        """
+        Method to predict actions for a batch of observations at once.
+        @param observations: game states, one row per bot
+        @return: actions (directions), one per bot
+        """
+        states = tf.constant(observations, dtype=tf.float32)
+        actions = np.argmax(self._predict_fn(states).numpy(), axis=1)
+        explore = np.random.random(len(actions)) < self.epsilon
+        actions[explore] = np.random.choice(self.action_space,
+                                            np.count_nonzero(explore))
+
+        return actions
+
     def train(self):
         """
         Method to train the model.
         """
-        if len(self.memory) < 1000:
+        if self._size < 1000:
             return
 
-        batch = np.array(random.sample(self.memory, self.batch_size))
-        states, actions, rewards, next_states, dones = np.hsplit(batch, 5)
-        states = np.array(list(map(lambda x: np.array(x[0]), states)))
-        actions = np.squeeze(actions, axis=1).astype(int)
-        rewards = np.squeeze(rewards, axis=1)
-        next_states = np.array(list(map(lambda x: np.array(x[0]),
-                                        next_states)))
-        dones = np.squeeze(dones, axis=1)
+        self.epsilon = (self.epsilon - self.epsilon_delta
+                        if self.epsilon > self.epsilon_final
+                        else self.epsilon_final)
 
-        q_eval = self.model.predict(states)
-        q_next = self.model.predict(next_states)
+        # Run gradient step only every train_interval calls
+        self._steps_since_train += 1
+        if self._steps_since_train < self.train_interval:
+            return
 
-        q_target = np.copy(q_eval)
-        batch_index = np.arange(self.batch_size, dtype=np.int32)
+        self._steps_since_train = 0
+        idx = np.random.randint(0, self._size, self.batch_size)
+        for buffer, batch in zip(self._buffers, self._batch):
+            np.take(buffer, idx, axis=0, out=batch)
 
-        q_target[batch_index, actions] = (rewards + self.gamma *
-                                          np.max(q_next, axis=1) * dones)
+        self._train_step_fn(*self._batch)
 
-        self.model.train_on_batch(states, q_target)
-        self.epsilon = (self.epsilon - self.epsilon_delta
-                        if self.epsilon > self.epsilon_final
-                        else self.epsilon_final)
+    def _train_step(self, states, actions, rewards, next_states, dones):
+        """
+        Method to compute Q targets and run single gradient step on mean
+        squared error, traced as one graph.
+        @param states: batch of fixed point states
+        @param actions: batch of actions
+        @param rewards: batch of rewards
+        @param next_states: batch of fixed point post move states
+        @param dones: batch of done flags
+        @return: loss value
+        """
+        states = tf.cast(states, tf.float32) / self.STATE_SCALE
+        next_states = tf.cast(next_states, tf.float32) / self.STATE_SCALE
+        q_next = self.model(next_states, training=False)
+        indices = tf.stack([self._batch_index, actions], axis=1)
+
+        with tf.GradientTape() as tape:
+            q_eval = self.model(states, training=True)
+            q_target = self._q_targets(tf.stop_gradient(q_eval),
+                                       tf.stop_gradient(q_next), indices,
+                                       rewards, dones, self.gamma)
+            loss = tf.reduce_mean(tf.square(q_target - q_eval))
+
+        variables = self.model.trainable_variables
+        gradients = tape.gradient(loss, variables)
+        self.model.optimizer.apply_gradients(zip(gradients, variables))
+
+        return loss
+
+    @staticmethod
+    @tf.function(jit_compile=True)
+    def _q_targets(q_eval, q_next, indices, rewards, dones, gamma):
+        """
+        Method to compute Q targets as one XLA compiled kernel.
+        @param q_eval: batch of Q values of states
+        @param q_next: batch of Q values of post move states
+        @param indices: (batch index, action) pairs to update
+        @param rewards: batch of rewards
+        @param dones: batch of done flags
+        @param gamma: gamma parameter in Q-learning
+        @return: batch of target Q values
+        """
+        updates = rewards + gamma * tf.reduce_max(q_next, axis=1) * dones
+        return tf.tensor_scatter_nd_update(q_eval, indices, updates)
 
     def save_model(self):
         """
@@ -1,10 +1,10 @@
 import curses
-import random
 import argparse
+import numpy as np
 from enum import Enum
 from network import DQNetwork
 from agents import Bot, Snake
-from utils import Grid, Cell, KeyboardListener
+from utils import Grid, Cell
 
 
 class Game:
@@ -21,29 +21,45 @@ class Game:
         """
         self.game_mode = game_mode
         self.grid = Grid(rows, cols)
-        self.players = [Snake(self.grid[rows - 2, 1],
+        if game_mode == self.Mode.BOT:
+            self.model = DQNetwork(gamma=0.99, n_actions=6, epsilon=0.01,
+                                   batch_size=32, input_dims=15, train=False)
+
+        self.reset()
+
+    def reset(self):
+        """
+        Method to restore initial playing area and players without
+        rebuilding the grid.
+        """
+        self.grid.reset()
+        self.players = [Snake(self.grid, self.grid[self.grid.rows - 2, 1],
                               Snake.Direction.NORTH_EAST)]
 
-        if game_mode == self.Mode.BOT:
-            bot = Bot(self.grid[self.grid.rows - 2, self.grid.cols - 2],
+        if self.game_mode == self.Mode.BOT:
+            bot = Bot(self.grid,
+                      self.grid[self.grid.rows - 2, self.grid.cols - 2],
                       Bot.Direction.NORTH_WEST)
             self.players.append(bot)
-            self.model = DQNetwork(gamma=0.99, n_actions=6, epsilon=0.01,
-                                   batch_size=32, input_dims=15, train=False)
 
-    def _insert_fruit(self):
+        self._update_active_players()
+
+    def _update_active_players(self):
         """
-        Method to place new fruit when previous one was eaten.
+        Method to rebuild lists of players (and bots) that have not lost
+        yet. Called only when some player lost.
         """
-        cell = random.choice(self.grid[Cell.Type.NORMAL])
-        cell.cell_type = Cell.Type.FRUIT
+        self._active = [player for player in self.players
+                        if not player.lost]
+        self._active_bots = [player for player in self._active
+                             if isinstance(player, Bot)]
 
-    def get_active_players(self):
+    def _insert_fruit(self):
         """
-        Get list of players that have not lost yet.
-        @return: list of players that have not lost yet
+        Method to place new fruit when previous one was eaten.
         """
-        return list(filter(lambda x: not x.lost, self.players))
+        cell = self.grid.random_cell(Cell.Type.NORMAL)
+        cell.cell_type = Cell.Type.FRUIT
 
     def _play(self, stdscr):
         """
@@ -63,28 +79,45 @@ class Game:
         curses.init_pair(5, curses.COLOR_YELLOW, curses.COLOR_BLACK)
 
         self._insert_fruit()
-        with KeyboardListener():
-            while active_players := self.get_active_players():
-                # Update postion for each player
-                for player in active_players:
-                    if isinstance(player, Bot):
-                        observation, _ = player.get_observation(self.grid)
-                        action = self.model.choose_action(observation)
-                        player.update_direction(action)
-                    else:
-                        player.update_direction(KeyboardListener.key())
-
-                    player.move(self)
-
-                # Update score for each player
-                for i, player in enumerate(self.players):
-                    info = f"{player._snake_type.name} SCORE: {player.score}"
-                    color = curses.color_pair(player._snake_type.value + 1)
-                    stdscr.addstr(0, i * (window_width // 2), info, color)
-
-                self.grid.display(stdscr)
-                stdscr.refresh()
-                curses.napms(400)
+        stdscr.nodelay(True)
+        key = "e"
+        while self._active:
+            # Read keys pressed since last tick and keep the last valid one
+            while (ch := stdscr.getch()) != -1:
+                if 0 <= ch < 256 and chr(ch) in Snake.VALID_KEYS:
+                    key = chr(ch)
+
+            # Predict directions for all bots at once
+            if self._active_bots:
+                observations = np.stack(
+                    [bot.get_observation(self.grid)[0]
+                     for bot in self._active_bots])
+                actions = self.model.choose_actions(observations)
+                for bot, action in zip(self._active_bots, actions):
+                    bot.update_direction(action)
+
+            # Update postion for each player
+            any_lost = False
+            for player in self._active:
+                if not isinstance(player, Bot):
+                    player.update_direction(key)
+
+                player.move(self)
+                any_lost |= player.lost
+
+            if any_lost:
+                self._update_active_players()
+
+            # Update score for each player
+            for i, player in enumerate(self.players):
+                name = Cell.NAMES[player._snake_type]
+                info = f"{name} SCORE: {player.score}"
+                color = curses.color_pair(player._snake_type + 1)
+                stdscr.addstr(0, i * (window_width // 2), info, color)
+
+            self.grid.display(stdscr)
+            stdscr.refresh()
+            curses.napms(400)
 
     def play(self):
         curses.wrapper(self._play)
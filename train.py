@@ -1,28 +1,27 @@
-import random
+import numpy as np
 from utils import Cell
 from snake import Game
 from agents import Bot
 from network import DQNetwork
-from tensorflow.python.framework.ops import disable_eager_execution
 
 
 if __name__ == '__main__':
-    disable_eager_execution()
     model = DQNetwork(gamma=0.99, n_actions=6, epsilon=1.0,
-                      batch_size=32, input_dims=15)
+                      batch_size=128, input_dims=15, train_interval=4)
     episodes = 10000
     scores = []
+    game = Game()
 
     for i in range(episodes):
         score = counter = 0
-        game = Game()
-        bot = Bot(game.grid[game.grid.rows - 2, game.grid.cols - 2],
+        game.reset()
+        bot = Bot(game.grid,
+                  game.grid[game.grid.rows - 2, game.grid.cols - 2],
                   Bot.Direction.NORTH_WEST)
 
         # Add inactive bots as an obstacles
-        for _ in range(10):
-            Bot(random.choice(game.grid[Cell.Type.NORMAL]),
-                Bot.Direction.NORTH_WEST)
+        for cell in game.grid.random_cells(Cell.Type.NORMAL, 10):
+            cell.cell_type = Cell.Type.BOT
 
         game._insert_fruit()
         bot.move(game)
@@ -33,7 +32,8 @@ if __name__ == '__main__':
             bot.update_direction(action)
             bot.move(game)
 
-            observation_, reward = (([0] * 15, -10) if bot.lost
+            observation_, reward = ((np.zeros(15, np.float32), -10)
+                                    if bot.lost
                                     else bot.get_observation(game.grid))
             score += reward
 
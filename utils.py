@@ -1,57 +1,12 @@
-import sys
-import tty
 import curses
-import termios
-import threading
-from enum import Enum
-
-
-class KeyboardListener:
-    __key = "e"
-    VALID_KEYS = ("w", "e", "q", "s", "a", "d")
-
-    def __init__(self):
-        self.config = termios.tcgetattr(sys.stdin)
-        self.stop_thread = False
-
-    @classmethod
-    def key(cls):
-        """
-        Get last pressed key.
-        @return: last pressed key
-        """
-        return cls.__key
-
-    @classmethod
-    def __set_key(cls, value):
-        """
-        Update key value.
-        """
-        cls.__key = value
-
-    def __get_key(self):
-        """
-        Update key value based on keyboard input.
-        """
-        while not self.stop_thread:
-            key = sys.stdin.read(1)[0]
-            if key in self.VALID_KEYS:
-                self.__set_key(key)
-
-    def __enter__(self):
-        tty.setcbreak(sys.stdin)
-        self.thread = threading.Thread(target=self.__get_key)
-        self.thread.start()
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.stop_thread = True
-        self.thread.join()
-        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.config)
+import random
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
 
 
 class Cell:
-    class Type(Enum):
+    class Type:
         NORMAL = 0
         BOUND = 1
         SNAKE = 2
@@ -60,7 +15,7 @@ class Cell:
 
     NAMES = (" ", "BOUND", "SNAKE", "BOT", "FRUIT")
 
-    def __init__(self, x: int, y: int, cell_type: Type):
+    def __init__(self, x: int, y: int, cell_type: int):
         """
         @param x: cell x coordinate
         @param y: cell y coordinate
@@ -68,8 +23,9 @@ class Cell:
         """
         self.x = x
         self.y = y
+        self._grid = None
         self.__cell_type = cell_type
-        self.__name = self.NAMES[cell_type.value]
+        self.__name = self.NAMES[cell_type]
 
     @property
     def name(self):
@@ -88,31 +44,76 @@ class Cell:
         return self.__cell_type
 
     @cell_type.setter
-    def cell_type(self, value: Type):
+    def cell_type(self, value: int):
         """
         Set cell type and cell name.
         @param value: new cell type
         """
+        if self._grid is not None:
+            self._grid._update_type(self, self.__cell_type, value)
         self.__cell_type = value
-        self.__name = self.NAMES[self.__cell_type.value]
+        self.__name = self.NAMES[value]
 
 
 class Grid(list):
     def __init__(self, rows: int, cols: int):
         self.rows = rows
         self.cols = cols
-        super().__init__([Cell(i, j, Cell.Type.BOUND if self.__is_edge(i, j)
-                               else Cell.Type.NORMAL)
+        # Fields on edge are bounds, the rest are normal
+        edge = np.ones((self.rows, self.cols), np.bool_)
+        edge[1:-1, 1:-1] = False
+        self.types = np.where(edge, Cell.Type.BOUND,
+                              Cell.Type.NORMAL).astype(np.int8)
+        types = self.types.tolist()
+        super().__init__([Cell(i, j, types[i][j])
                           for i in range(self.rows) for j in range(self.cols)])
+        # Insertion ordered buckets (dicts used as ordered sets), so
+        # iteration order does not depend on memory layout
+        self._by_type = {cell_type: {}
+                         for cell_type in range(len(Cell.NAMES))}
+        for cell in self:
+            cell._grid = self
+            self._by_type[cell.cell_type][cell] = None
+
+    def reset(self):
+        """
+        Method to restore initial playing area in place. Bound cells never
+        change type, so only occupied cells are set back to normal.
+        """
+        for cell_type in (Cell.Type.SNAKE, Cell.Type.BOT, Cell.Type.FRUIT):
+            for cell in tuple(self._by_type[cell_type]):
+                cell.cell_type = Cell.Type.NORMAL
+
+    def random_cell(self, cell_type: int) -> Cell:
+        """
+        Method to draw random cell of given type, in grid order.
+        @param cell_type: cell type
+        @return: random cell of given type
+        """
+        index = random.choice(np.flatnonzero(self.types == cell_type))
+        return super().__getitem__(int(index))
+
+    def random_cells(self, cell_type: int, count: int) -> list:
+        """
+        Method to draw distinct random cells of given type, in grid order.
+        @param cell_type: cell type
+        @param count: number of cells
+        @return: list of random cells of given type
+        """
+        indices = random.sample(
+            np.flatnonzero(self.types == cell_type).tolist(), count)
+        return [super(Grid, self).__getitem__(index) for index in indices]
 
-    def __is_edge(self, i: int, j: int) -> bool:
+    def _update_type(self, cell: Cell, old: int, new: int):
         """
-        Method to check if field is on edge.
-        @param i: x axis coordinate
-        @param j: y axis coordinate
-        @return: True if cell is on edge, otherwise False
+        Keep type buckets and type array in sync with cell type change.
+        @param cell: changed cell
+        @param old: previous cell type
+        @param new: new cell type
         """
-        return not all((i, j, self.rows - 1 - i, self.cols - 1 - j))
+        self._by_type[old].pop(cell, None)
+        self._by_type[new][cell] = None
+        self.types[cell.x, cell.y] = new
 
     def display(self, stdscr):
         """
@@ -120,18 +121,16 @@ class Grid(list):
         @param stdscr: curses window object representing the entire screen
         """
         cell = self[0, 0]
-        color = curses.color_pair(cell.cell_type.value + 1)
+        color = curses.color_pair(cell.cell_type + 1)
         stdscr.addstr(1, 0, (" " * 9 + "_" * 5) * (self.cols // 2), color)
         for y in range(self.rows * 4 + 2):
             first_two_lines = y < 2
             line_beginning_character = " " if first_two_lines else "\\"
 
-            x_offset = 0
-            line = (line_beginning_character,
-                    " " + line_beginning_character, " ", "")[y % 4]
-            color = curses.color_pair(cell.cell_type.value + 1)
-            stdscr.addstr(y + 2, x_offset, line, color)
-            x_offset += len(line)
+            # Collect (cell type, text) segments of the whole line
+            segments = [(cell.cell_type,
+                         (line_beginning_character,
+                          " " + line_beginning_character, " ", "")[y % 4])]
 
             for x in range(-int(self.cols / 2), int(self.cols / 2) + 1):
                 ix = y // 4
@@ -141,16 +140,29 @@ class Grid(list):
 
                 line = ("/" + cell.name.center(7) + "\\", " " * 7, "_" * 5,
                         "/" + 5 * " " + "\\")[(y + x * 2 + self.cols) % 4]
-                color = curses.color_pair(cell.cell_type.value + 1)
+                segments.append((cell.cell_type, line))
+
+            segments.append((cell.cell_type,
+                             "//  "[3 if first_two_lines else y % 4]))
+
+            # Write each run of same colored segments at once
+            x_offset = 0
+            for cell_type, run in groupby(segments, key=itemgetter(0)):
+                line = "".join(text for _, text in run)
+                color = curses.color_pair(cell_type + 1)
                 stdscr.addstr(y + 2, x_offset, line, color)
                 x_offset += len(line)
 
-            line = "//  "[3 if first_two_lines else y % 4]
-            color = curses.color_pair(cell.cell_type.value + 1)
-            stdscr.addstr(y + 2, x_offset, line, color)
+    def cells_of(self, cell_type: int) -> list:
+        """
+        Get cells of given type.
+        @param cell_type: cell type
+        @return: list of cells of given type
+        """
+        return list(self._by_type[cell_type])
 
     def __getitem__(self, key):
         if isinstance(key, tuple):
-            return next(filter(lambda cell: (cell.x, cell.y) == key, self))
-        elif isinstance(key, Cell.Type):
-            return list(filter(lambda cell: cell.cell_type == key, self))
+            x, y = key
+            return super().__getitem__(x * self.cols + y)
+        return super().__getitem__(key)